@@ -1,7 +1,29 @@
 import boto3
 import pandas as pd
+import numpy as np
+import pyarrow.csv as pacsv
+import pyarrow.fs as pafs
 import os
 import traceback
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+
+@lru_cache(maxsize=None)
+def _s3_filesystem() -> pafs.S3FileSystem:
+    """
+    Returns the S3 filesystem shared by every call in this process, so warm
+    Lambda invocations reuse its credentials and connection pool.
+    """
+    return pafs.S3FileSystem(region=os.getenv("AWS_REGION"))
+
+
+@lru_cache(maxsize=None)
+def _s3_resource():
+    """
+    Returns the boto3 S3 resource shared by every call in this process.
+    """
+    return boto3.resource("s3")
 
 
 def import_csv(bucket_name:str, file_key:str) -> pd.DataFrame:
@@ -17,13 +39,14 @@ def import_csv(bucket_name:str, file_key:str) -> pd.DataFrame:
         or None if an error occurred during the import process.
     """
     
-    s3 = boto3.client('s3')
+    s3_fs = _s3_filesystem()
 
     # Read CSV file from S3 into a Pandas DataFrame
     try:
-        # Use 's3.get_object' to get the object and 'pd.read_csv' to read it into a DataFrame
-        obj = s3.get_object(Bucket=bucket_name, Key=file_key)
-        df = pd.read_csv(obj['Body'])
+        # Stream the object straight into the PyArrow CSV reader so parsing overlaps the download
+        with s3_fs.open_input_stream(f"{bucket_name}/{file_key}") as f:
+            table = pacsv.read_csv(f)
+        df = table.to_pandas()
         
     except Exception as e:
         print(f"Error: {e}")
@@ -34,6 +57,24 @@ def import_csv(bucket_name:str, file_key:str) -> pd.DataFrame:
 
 
 class CsvCleaner:
+    # Acceptable (low, high) range for each numeric column, keyed by exact column name
+    RULES = {
+        "speed_over_ground": (0, 100),
+        "Longitude": (-180, 180),
+        "Latitude": (-90, 90),
+        "engine_fuel_rate": (0, 100),
+    }
+
+    # Columns stored as float32 to halve their memory and file size. Values are the nearest
+    # float32, so 20.53 reads back as 20.530000686645508 when widened to float64.
+    # Longitude and Latitude keep float64 precision
+    FLOAT32_COLS = ("speed_over_ground", "engine_fuel_rate")
+
+    # Parquet writer settings; rows are sorted by Timestamp, so each row group's
+    # min/max statistics cover a narrow time slice that readers can skip on
+    ROW_GROUP_SIZE = 200_000
+    COMPRESSION = "zstd"
+
     @staticmethod
     def timestamp_clean(df:pd.DataFrame, col_name:str) -> tuple[pd.DataFrame,int]:
         """
@@ -51,29 +92,35 @@ class CsvCleaner:
             and the number of rows removed.
         """
         # convert the column to numeric with any errors(for example strings or letter) to NaN
-        df[col_name] = pd.to_numeric(df[col_name], errors="coerce")
+        if not pd.api.types.is_numeric_dtype(df[col_name]):
+            df[col_name] = pd.to_numeric(df[col_name], errors="coerce")
         
-        df.dropna(subset=[col_name], inplace=True)
-
-        # Calculate the initial number of rows
-        initial_rows = df.shape[0]
+        # Calculate the initial number of rows, not counting NaN timestamps
+        initial_rows = int(df[col_name].count())
         
-        #Filter out rows with "Timestamp" values not containing 10 digits
-        df = df[df[col_name].apply(lambda x: len(str(int(x))) == 10)]
+        #Filter out rows with "Timestamp" values not containing 10 digits (NaN fails the mask too)
+        vals = df[col_name].to_numpy()
+        mask = (vals >= 1_000_000_000) & (vals < 10_000_000_000)
+        df = df[mask]
 
         #calculate how many rows removed
         rows_removed = initial_rows - df.shape[0]
 
-        # Convert the Unix timestamp to datetime with seconds
-        df[col_name] = pd.to_datetime(df[col_name], unit="s")
+        # Convert the Unix timestamp to datetime with seconds, using the int64 fast path
+        # only when every value is whole so fractional seconds are kept otherwise
+        arr = df[col_name].to_numpy()
+        if arr.dtype.kind in "iu" or np.all(arr == np.floor(arr)):
+            arr = arr.astype(np.int64, copy=False)
+        df[col_name] = pd.to_datetime(arr, unit="s")
 
         # Sort the DataFrame by the timestamp column
-        df = df.sort_values(by=col_name)
+        order = np.argsort(df[col_name].to_numpy().view("i8"), kind="stable")
+        df = df.take(order)
 
         return df, rows_removed
     
     @staticmethod
-    def clean_columns(df: pd.DataFrame, col_name: str, low: float, high: float) -> tuple[pd.DataFrame, int]:
+    def clean_columns(df: pd.DataFrame, col_name: str, low: float, high: float, dtype: type = np.float64) -> tuple[pd.DataFrame, int]:
         """
         Cleans the specified column in the DataFrame by converting it to numeric, 
         filtering out values that are not within the specified range, 
@@ -84,19 +131,24 @@ class CsvCleaner:
             col_name (str): The name of the column to be cleaned.
             low (float): The lower bound of the acceptable range.
             high (float): The upper bound of the acceptable range.
+            dtype (type): The float dtype of the cleaned column. Defaults to np.float64.
 
         Returns:
             tuple[pd.DataFrame, int]: A tuple containing the cleaned DataFrame 
             and the number of rows removed.
         """
 
-        # Convert column to numeric, making errors to Nan instead
-        df[col_name] = pd.to_numeric(df[col_name], errors="coerce")
+        # Convert column to numeric, making errors to Nan instead (skipped if already numeric)
+        values = df[col_name]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors="coerce")
+        arr = values.to_numpy(dtype=dtype)
 
         # Calculate the initial number of rows
         initial_rows = df.shape[0]
 
-        df.loc[~df[col_name].between(low, high), col_name] = float('nan')
+        # Keep in range values and write NaN elsewhere in a single np.where pass, instead of a .loc boolean-indexer write
+        df[col_name] = np.where((arr >= low) & (arr <= high), arr, np.nan)
 
         # Calculate the number of rows removed
         rows_removed = initial_rows - df.shape[0]
@@ -121,40 +173,44 @@ class CsvCleaner:
         
         total_rows_removed = 0
 
-        # Clean the DataFrame
-        for col in df.columns:
-            if "Timestamp" in col:
-                df, rows_removed = CsvCleaner.timestamp_clean(df.copy(), col)
-                total_rows_removed += rows_removed
-            
-            if "speed_over_ground" in col:
-                low = 0
-                high = 100
-                df, rows_removed = CsvCleaner.clean_columns(df.copy(), col, low, high)
-                total_rows_removed += rows_removed
-            
-            if "Longitude" in col:
-                low = -180
-                high = 180
-                df, rows_removed = CsvCleaner.clean_columns(df.copy(), col, low, high)
-                total_rows_removed += rows_removed
+        # Copy once up front so the caller's DataFrame is left untouched
+        df = df.copy()
 
-            if "Latitude" in col:
-                low = -90
-                high = 90
-                df, rows_removed = CsvCleaner.clean_columns(df.copy(), col, low, high)
-                total_rows_removed += rows_removed
+        # Clean the DataFrame, dropping invalid timestamps first so fewer rows are range checked
+        if "Timestamp" in df.columns:
+            df, rows_removed = CsvCleaner.timestamp_clean(df, "Timestamp")
+            total_rows_removed += rows_removed
+
+        # Range check the remaining columns concurrently, numpy releases the GIL in its kernels.
+        # Each worker cleans its own one column frame, so no two threads write to the same DataFrame
+        columns = {col: df[col].to_frame() for col in df.columns if col in CsvCleaner.RULES}
+
+        def _clean(item):
+            col, col_df = item
+            low, high = CsvCleaner.RULES[col]
+            dtype = np.float32 if col in CsvCleaner.FLOAT32_COLS else np.float64
+            return CsvCleaner.clean_columns(col_df, col, low, high, dtype)
+
+        if columns:
+            with ThreadPoolExecutor(max_workers=len(columns)) as executor:
+                cleaned = list(executor.map(_clean, columns.items()))
 
-            if "engine_fuel_rate" in col:
-                low = 0
-                high = 100
-                df,rows_removed = CsvCleaner.clean_columns(df.copy(), col, low, high)
+            # Assign on the main thread, the DataFrame itself is not thread safe
+            for col, (col_df, rows_removed) in zip(columns, cleaned):
+                df[col] = col_df[col]
                 total_rows_removed += rows_removed
 
         # Save the cleaned DataFrame as a Parquet file
     
         cleaned_parquet_file = f"/tmp/{file_key}.parquet"
-        df.to_parquet(cleaned_parquet_file, index=False)
+        df.to_parquet(
+            cleaned_parquet_file,
+            index=False,
+            compression=CsvCleaner.COMPRESSION,
+            row_group_size=CsvCleaner.ROW_GROUP_SIZE,
+            use_dictionary=True,
+            write_statistics=True,
+        )
 
         print(f"Total rows removed: {total_rows_removed}")
 
@@ -172,7 +228,7 @@ def upload_file(parquet_file: str, bucket_name: str) -> None:
     Returns:
         None
     """
-    s3_resource = boto3.resource("s3")
+    s3_resource = _s3_resource()
 
     try:
         filename = os.path.basename(parquet_file)
@@ -1,11 +1,26 @@
-import boto3
 import pandas as pd
+import numpy as np
+import os
 import traceback
-import pyarrow.parquet as pq
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow.dataset as ds
+import pyarrow.csv as pacsv
+import pyarrow.fs as pafs
+import pyarrow.compute as pc
 import pyarrow as pa
 from pathlib import Path
 
 
+@lru_cache(maxsize=None)
+def _s3_filesystem() -> pafs.S3FileSystem:
+    """
+    Returns the S3 filesystem shared by every call in this process, so warm
+    Lambda invocations reuse its credentials and connection pool.
+    """
+    return pafs.S3FileSystem(region=os.getenv("AWS_REGION"))
+
+
 def import_csv(bucket_name:str, file_key:str) -> pd.DataFrame:
     """
     Imports a CSV file from an S3 bucket into a Pandas DataFrame.
@@ -19,13 +34,14 @@ def import_csv(bucket_name:str, file_key:str) -> pd.DataFrame:
         or None if an error occurred during the import process.
     """
     
-    s3 = boto3.client('s3')
+    s3_fs = _s3_filesystem()
 
     # Read CSV file from S3 into a Pandas DataFrame
     try:
-        # Use 's3.get_object' to get the object and 'pd.read_csv' to read it into a DataFrame
-        obj = s3.get_object(Bucket=bucket_name, Key=file_key)
-        df = pd.read_csv(obj['Body'])
+        # Stream the object straight into the PyArrow CSV reader so parsing overlaps the download
+        with s3_fs.open_input_stream(f"{bucket_name}/{file_key}") as f:
+            table = pacsv.read_csv(f)
+        df = table.to_pandas()
         return df
         
     except Exception as e:
@@ -37,6 +53,27 @@ def import_csv(bucket_name:str, file_key:str) -> pd.DataFrame:
 
 
 class CsvCleaner:
+    # Acceptable (low, high) range for each numeric column, keyed by exact column name
+    RULES = {
+        "speed_over_ground": (0, 100),
+        "Longitude": (-180, 180),
+        "Latitude": (-90, 90),
+        "engine_fuel_rate": (0, 100),
+    }
+
+    # Columns stored as float32 to halve their memory and file size. Values are the nearest
+    # float32, so 20.53 reads back as 20.530000686645508 when widened to float64.
+    # Longitude and Latitude keep float64 precision
+    FLOAT32_COLS = ("speed_over_ground", "engine_fuel_rate")
+
+    # Parquet writer settings; rows are sorted by Timestamp, so each row group's
+    # min/max statistics cover a narrow time slice that readers can skip on
+    ROW_GROUP_SIZE = 200_000
+    COMPRESSION = "zstd"
+
+    # Columns rounded to two decimals after cleaning (in float32, see FLOAT32_COLS)
+    ROUND_COLS = ("speed_over_ground", "engine_fuel_rate")
+
     @staticmethod
     def timestamp_clean(df:pd.DataFrame, col_name:str) -> tuple[pd.DataFrame,int]:
         """
@@ -54,29 +91,35 @@ class CsvCleaner:
             and the number of rows removed.
         """
         # convert the column to numeric with any errors(for example strings or letter) to NaN
-        df[col_name] = pd.to_numeric(df[col_name], errors="coerce")
+        if not pd.api.types.is_numeric_dtype(df[col_name]):
+            df[col_name] = pd.to_numeric(df[col_name], errors="coerce")
         
-        df.dropna(subset=[col_name], inplace=True)
-
-        # Calculate the initial number of rows
-        initial_rows = df.shape[0]
+        # Calculate the initial number of rows, not counting NaN timestamps
+        initial_rows = int(df[col_name].count())
         
-        #Filter out rows with "Timestamp" values not containing 10 digits
-        df = df[df[col_name].apply(lambda x: len(str(int(x))) == 10)]
+        #Filter out rows with "Timestamp" values not containing 10 digits (NaN fails the mask too)
+        vals = df[col_name].to_numpy()
+        mask = (vals >= 1_000_000_000) & (vals < 10_000_000_000)
+        df = df[mask]
 
         #calculate how many rows removed
         rows_removed = initial_rows - df.shape[0]
 
-        # Convert the Unix timestamp to datetime with seconds
-        df[col_name] = pd.to_datetime(df[col_name], unit="s")
+        # Convert the Unix timestamp to datetime with seconds, using the int64 fast path
+        # only when every value is whole so fractional seconds are kept otherwise
+        arr = df[col_name].to_numpy()
+        if arr.dtype.kind in "iu" or np.all(arr == np.floor(arr)):
+            arr = arr.astype(np.int64, copy=False)
+        df[col_name] = pd.to_datetime(arr, unit="s")
 
         # Sort the DataFrame by the timestamp column
-        df = df.sort_values(by=col_name)
+        order = np.argsort(df[col_name].to_numpy().view("i8"), kind="stable")
+        df = df.take(order)
 
         return df, rows_removed
     
     @staticmethod
-    def clean_columns(df: pd.DataFrame, col_name: str, low: float, high: float) -> tuple[pd.DataFrame, int]:
+    def clean_columns(df: pd.DataFrame, col_name: str, low: float, high: float, dtype: type = np.float64) -> tuple[pd.DataFrame, int]:
         """
         Cleans the specified column in the DataFrame by converting it to numeric, 
         filtering out values that are not within the specified range, 
@@ -87,19 +130,24 @@ class CsvCleaner:
             col_name (str): The name of the column to be cleaned.
             low (float): The lower bound of the acceptable range.
             high (float): The upper bound of the acceptable range.
+            dtype (type): The float dtype of the cleaned column. Defaults to np.float64.
 
         Returns:
             tuple[pd.DataFrame, int]: A tuple containing the cleaned DataFrame 
             and the number of rows removed.
         """
 
-        # Convert column to numeric, making errors to Nan instead
-        df[col_name] = pd.to_numeric(df[col_name], errors="coerce")
+        # Convert column to numeric, making errors to Nan instead (skipped if already numeric)
+        values = df[col_name]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors="coerce")
+        arr = values.to_numpy(dtype=dtype)
 
         # Calculate the initial number of rows
         initial_rows = df.shape[0]
 
-        df.loc[~df[col_name].between(low, high), col_name] = float('nan')
+        # Keep in range values and write NaN elsewhere in a single np.where pass, instead of a .loc boolean-indexer write
+        df[col_name] = np.where((arr >= low) & (arr <= high), arr, np.nan)
 
         # Calculate the number of rows removed
         rows_removed = initial_rows - df.shape[0]
@@ -122,41 +170,41 @@ class CsvCleaner:
         
         total_rows_removed = 0
 
-        # Clean the DataFrame
-        for col in df.columns:
-            if "Timestamp" in col:
-                df, rows_removed = CsvCleaner.timestamp_clean(df.copy(), col)
-                total_rows_removed += rows_removed
-            
-            if "speed_over_ground" in col:
-                low = 0
-                high = 100
-                df, rows_removed = CsvCleaner.clean_columns(df.copy(), col, low, high)
-                df[col] = df[col].round(2)
-                total_rows_removed += rows_removed
-            
-            if "Longitude" in col:
-                low = -180
-                high = 180
-                df, rows_removed = CsvCleaner.clean_columns(df.copy(), col, low, high)
-                total_rows_removed += rows_removed
+        # Copy once up front so the caller's DataFrame is left untouched
+        df = df.copy()
 
-            if "Latitude" in col:
-                low = -90
-                high = 90
-                df, rows_removed = CsvCleaner.clean_columns(df.copy(), col, low, high)
-                total_rows_removed += rows_removed
+        # Clean the DataFrame, dropping invalid timestamps first so fewer rows are range checked
+        if "Timestamp" in df.columns:
+            df, rows_removed = CsvCleaner.timestamp_clean(df, "Timestamp")
+            total_rows_removed += rows_removed
+
+        # Range check the remaining columns concurrently, numpy releases the GIL in its kernels.
+        # Each worker cleans its own one column frame, so no two threads write to the same DataFrame
+        columns = {col: df[col].to_frame() for col in df.columns if col in CsvCleaner.RULES}
+
+        def _clean(item):
+            col, col_df = item
+            low, high = CsvCleaner.RULES[col]
+            dtype = np.float32 if col in CsvCleaner.FLOAT32_COLS else np.float64
+            return CsvCleaner.clean_columns(col_df, col, low, high, dtype)
 
-            if "engine_fuel_rate" in col:
-                low = 0
-                high = 100
-                df,rows_removed = CsvCleaner.clean_columns(df.copy(), col, low, high)
-                df[col] = df[col].round(2)
+        if columns:
+            with ThreadPoolExecutor(max_workers=len(columns)) as executor:
+                cleaned = list(executor.map(_clean, columns.items()))
+
+            # Assign on the main thread, the DataFrame itself is not thread safe
+            for col, (col_df, rows_removed) in zip(columns, cleaned):
+                df[col] = col_df[col]
                 total_rows_removed += rows_removed
 
+        # Round the two decimal columns together in one block
+        round_cols = [col for col in CsvCleaner.ROUND_COLS if col in df.columns]
+        if round_cols:
+            df[round_cols] = np.round(df[round_cols].to_numpy(), 2)
+
         # Resample the DataFrame
         df.set_index('Timestamp', inplace=True)
-        df = df.resample('10s').mean()  # No fillna(0) here
+        df = df.resample('10s').mean(numeric_only=True)  # No fillna(0) here
         df = df.reset_index()
         
         # Save as partitioned Parquet file
@@ -176,46 +224,74 @@ class CsvCleaner:
             file_key (str): The key of the file.
 
         Returns:    
-            str: The path to the saved Parquet file.
+            str: The path to the Parquet file of the latest partition.
+
+        Raises:
+            ValueError: If no Parquet files were written.
         """
 
         # use path lib with file key to get the vessel name
         # Extract vessel name from the file key
         vessel_name = file_key.split('_')[0] # use path lib here for realdata
-        file_key_without_extension = file_key.replace('.csv', '')
-
-        df_copy = df.copy()
-
-        # Partition by timestamp
-        df_copy["year"] = df["Timestamp"].dt.year.astype(str)
-        df_copy["month"] = df["Timestamp"].dt.month.astype(str).str.zfill(2)
-        df_copy["day"] = df["Timestamp"].dt.day.astype(str).str.zfill(2)
-        
+        # Only the basename can be used as the file name, any key prefix would add a '/'
+        file_key_without_extension = Path(file_key).stem
+
+        # Partition by timestamp, deriving year/month/day with datetime64 unit arithmetic
+        ts = df["Timestamp"].to_numpy()
+        years = ts.astype("datetime64[Y]")
+        months = ts.astype("datetime64[M]")
+        days = ts.astype("datetime64[D]")
+        partition_values = {
+            "year": years.astype(np.int64) + 1970,
+            "month": (months - years).astype(np.int64) + 1,
+            "day": (days - months).astype(np.int64) + 1,
+        }
+
+        # Dictionary encode the keys so only the distinct values are formatted as zero padded strings
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for col, values in partition_values.items():
+            encoded = pc.dictionary_encode(pa.array(values))
+            labels = pc.utf8_lpad(pc.cast(encoded.dictionary, pa.string()), width=2, padding="0")
+            keys = pa.DictionaryArray.from_arrays(encoded.indices, labels)
+            table = table.append_column(col, keys)
 
         # Define the partition keys
-        partition_cols = ["year", "month", "day"]
+        partition_cols = list(partition_values)
+        partitioning = ds.partitioning(
+            pa.schema([(col, pa.string()) for col in partition_cols]), flavor="hive"
+        )
 
-        partition_df = df_copy.drop(columns=partition_cols)
-        
+        saved_files = []
 
-        # Iterate over each partition and save corresponding Parquet file
-        for _, partition in df_copy.groupby(partition_cols):
-            
-            partition_path = "/".join(f"{col}={partition[col].iloc[0]}" for col in partition_cols)
-            parquet_file_name = f"{vessel_name}/{partition_path}/{file_key_without_extension}.parquet" # do this locally
-            
-            # Write Parquet file to S3
-            parquet_buffer = pa.BufferOutputStream()
-            pq.write_table(pa.Table.from_pandas(partition_df), parquet_buffer)
-            parquet_bytes = parquet_buffer.getvalue().to_pybytes()
-            
-            s3_resource = boto3.resource("s3")
-            s3_object = s3_resource.Object(bucket_name, parquet_file_name)
-            s3_object.put(Body=parquet_bytes)
-
-            parquet_file_path = f"s3://{bucket_name}/{parquet_file_name}"
+        def _record_file(written_file):
+            parquet_file_path = f"s3://{written_file.path}"
+            saved_files.append(parquet_file_path)
             print(f"Parquet file saved at: {parquet_file_path}")
 
+        # Write every partition to S3 in one threaded Arrow call
+        s3_fs = _s3_filesystem()
+        ds.write_dataset(
+            table,
+            base_dir=f"{bucket_name}/{vessel_name}",
+            filesystem=s3_fs,
+            format="parquet",
+            file_options=ds.ParquetFileFormat().make_write_options(
+                compression=CsvCleaner.COMPRESSION, use_dictionary=True, write_statistics=True
+            ),
+            min_rows_per_group=CsvCleaner.ROW_GROUP_SIZE, # without this every incoming batch is flushed as its own row group
+            max_rows_per_group=CsvCleaner.ROW_GROUP_SIZE,
+            partitioning=partitioning,
+            basename_template=f"{file_key_without_extension}-{{i}}.parquet", # pyarrow requires the {i} counter
+            existing_data_behavior="overwrite_or_ignore",
+            file_visitor=_record_file,
+        )
+
+        if not saved_files:
+            raise ValueError(f"No Parquet files were written for {file_key}, the DataFrame is empty")
+
+        # Writer threads finish in any order, so return the latest partition deterministically
+        parquet_file_path = max(saved_files)
+
         return parquet_file_path
         
 
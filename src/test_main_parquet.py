@@ -1,6 +1,12 @@
 import unittest
+import tempfile
+from pathlib import Path
+from unittest import mock
 from main_parquet import import_csv, CsvCleaner, upload_file, process_lambda
+import main_parquet_part
 import pandas as pd 
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
 
 class TestMainParquet(unittest.TestCase):
     def setUp(self):
@@ -30,4 +36,87 @@ class TestMainParquet(unittest.TestCase):
         self.assertNotIn("ERROR", cleaned_df["Timestamp"]) # check for invalid timestamps
         self.assertTrue((cleaned_df.columns == self.test_df.columns).all()) #check data integrity (columns)
                                
-                               
\ No newline at end of file
+    def test_timestamp_clean_fractional_seconds(self):
+        # call the function with a timestamp that is not a whole number of seconds
+        df = pd.DataFrame({"Timestamp": [1707752942, 1707752941.5]})
+        cleaned_df, rows_removed = CsvCleaner.timestamp_clean(df, 'Timestamp')
+
+        # Check the fraction is kept and not truncated
+        self.assertEqual(rows_removed, 0)
+        self.assertEqual(cleaned_df["Timestamp"].iloc[0], pd.Timestamp("2024-02-12 15:49:01.500"))
+        self.assertEqual(cleaned_df["Timestamp"].iloc[1], pd.Timestamp("2024-02-12 15:49:02"))
+                               
+    def test_clean_columns(self):
+        # call the function
+        cleaned_df, rows_removed = CsvCleaner.clean_columns(self.test_df.copy(), 'Latitude', -90, 90)
+
+        # Check if the returns work
+        self.assertEqual(cleaned_df.shape, self.test_df.shape) # no rows are dropped
+        self.assertEqual(rows_removed, 0) # check number of rows removed
+        self.assertEqual(cleaned_df["Latitude"].isnull().sum(), 4) # out of range, NaN and string values
+        self.assertTrue(cleaned_df["Latitude"].dropna().between(-90, 90).all()) # check range
+
+    def test_clean_file(self):
+        # call the function on the DataFrame itself, keeping a snapshot to compare with afterwards
+        original_df = self.test_df.copy()
+        cleaned_parquet_file = CsvCleaner.clean_file(self.test_df, self.test_file_key)
+        cleaned_df = pd.read_parquet(cleaned_parquet_file)
+
+        # Check if the returns work
+        self.assertEqual(cleaned_parquet_file, f"/tmp/{self.test_file_key}.parquet") # check file path
+        self.assertEqual(cleaned_df.shape, (4,5)) # check DataFrame shape
+        self.assertTrue(cleaned_df["speed_over_ground"].dropna().between(0, 100).all()) # check ranges
+        self.assertTrue(cleaned_df["Longitude"].dropna().between(-180, 180).all())
+        self.assertTrue(cleaned_df["Latitude"].dropna().between(-90, 90).all())
+        self.assertTrue(cleaned_df["engine_fuel_rate"].dropna().between(0, 100).all())
+        self.assertEqual(cleaned_df["speed_over_ground"].dtype, "float32") # check downcast columns
+        self.assertEqual(cleaned_df["engine_fuel_rate"].dtype, "float32")
+        self.assertEqual(cleaned_df["Longitude"].dtype, "float64") # check full precision columns
+        self.assertEqual(cleaned_df["Latitude"].dtype, "float64")
+        pd.testing.assert_frame_equal(self.test_df, original_df) # check the input DataFrame is left untouched
+
+
+class TestMainParquetPart(unittest.TestCase):
+    def setUp(self):
+        # set up data crossing a year and a month boundary
+        self.test_file_key = "incoming/vessel9_test-file.csv"
+        self.test_df = pd.DataFrame({"Timestamp": pd.to_datetime(["2023-12-31 23:59:50", "2024-01-31 23:59:50",
+                                                                  "2024-02-01 00:00:00", "2024-02-01 12:00:00"]),
+                                     "speed_over_ground": [1.0, 2.0, 3.0, 4.0]})
+
+    def test_partition_and_save(self):
+        with tempfile.TemporaryDirectory() as bucket_name, \
+                mock.patch.object(main_parquet_part, "_s3_filesystem", pafs.LocalFileSystem):
+            # call the function
+            parquet_file = main_parquet_part.CsvCleaner._partition_and_save(self.test_df, self.test_file_key, bucket_name)
+
+            base_dir = Path(bucket_name) / "incoming" / "vessel9"
+            written_files = sorted(path.relative_to(base_dir).as_posix() for path in base_dir.rglob("*.parquet"))
+
+            # Check the hive partition directories and the returned (latest) path
+            expected_rows = {"year=2023/month=12/day=31/vessel9_test-file-0.parquet": self.test_df["Timestamp"][[0]],
+                             "year=2024/month=01/day=31/vessel9_test-file-0.parquet": self.test_df["Timestamp"][[1]],
+                             "year=2024/month=02/day=01/vessel9_test-file-0.parquet": self.test_df["Timestamp"][[2, 3]]}
+            self.assertEqual(written_files, list(expected_rows))
+            self.assertEqual(parquet_file, f"s3://{base_dir.as_posix()}/{written_files[-1]}")
+
+            # Check each file only holds the rows of its own day
+            for written_file, expected in expected_rows.items():
+                timestamps = pq.read_table(base_dir / written_file).to_pandas()["Timestamp"]
+                self.assertEqual(timestamps.tolist(), expected.tolist())
+
+    def test_partition_and_save_row_groups(self):
+        # set up more rows than one Arrow batch (32768 rows) within a single day
+        df = pd.DataFrame({"Timestamp": pd.date_range("2024-02-01", periods=120_000, freq="100ms"),
+                           "speed_over_ground": 1.0})
+
+        with tempfile.TemporaryDirectory() as bucket_name, \
+                mock.patch.object(main_parquet_part, "_s3_filesystem", pafs.LocalFileSystem), \
+                mock.patch.object(main_parquet_part.CsvCleaner, "ROW_GROUP_SIZE", 50_000):
+            # call the function
+            parquet_file = main_parquet_part.CsvCleaner._partition_and_save(df, self.test_file_key, bucket_name)
+
+            # Check the rows are written in full row groups of ROW_GROUP_SIZE
+            metadata = pq.ParquetFile(parquet_file.removeprefix("s3://")).metadata
+            row_groups = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+            self.assertEqual(row_groups, [50_000, 50_000, 20_000])